@@ -6,6 +6,16 @@ import datetime
 import subprocess
 import keyword
 import re
+import sys
+import time
+import signal
+import itertools
+import threading
+import collections
+import atexit
+import random
+import shutil
+import tempfile
 
 # ----------------------------
 # Llama3 Model Loading (CPU-friendly, quantized)
@@ -17,13 +27,14 @@ print("Loading Llama 3 model... This may take a while on CPU.")
 llm = Llama(model_path=LLAMA_MODEL_PATH)
 print("Model loaded successfully!")
 
-def llama3_generate(prompt, project_name=None, max_tokens=256):
+def llama3_generate(prompt, project_name=None, max_tokens=256, kind="chat"):
     """
     Generate text using local Llama 3.
+    `kind` tags the session entry (e.g. "autocomplete") so it can be sampled.
     """
     response = llm(prompt=prompt, max_tokens=max_tokens, stop=["\n\n"]).get("choices")[0]["text"]
     if project_name:
-        save_session(project_name, prompt, response)
+        save_session(project_name, prompt, response, kind=kind)
     return response
 
 # ----------------------------
@@ -32,20 +43,166 @@ def llama3_generate(prompt, project_name=None, max_tokens=256):
 MEMORY_DIR = "./session_memory"
 os.makedirs(MEMORY_DIR, exist_ok=True)
 
-def load_session(project_name):
-    path = os.path.join(MEMORY_DIR, f"{project_name}_session.json")
-    if os.path.exists(path):
+SESSION_FLUSH_INTERVAL = 2.0      # seconds between background flushes
+SESSION_FLUSH_BATCH = 50          # flush early once this many entries are pending
+SESSION_MAX_ENTRIES = 1000        # entries kept per project after compaction
+SESSION_MAX_PENDING = 5000        # unwritten entries kept in memory if writes keep failing
+SESSION_LOG_SAMPLE_RATES = {"autocomplete": 0.0}  # per-kind sampling; missing kinds log everything
+
+class SessionStore:
+    """
+    Write-behind session memory. Entries are buffered in memory and appended
+    to `{project}_session.jsonl` (one JSON object per line) by a background
+    thread. When a log grows past twice `max_entries` it is compacted down to
+    the most recent `max_entries`. If writes keep failing, at most
+    `max_pending` entries are held in memory and the oldest are dropped.
+    """
+    def __init__(self, directory=MEMORY_DIR, flush_interval=SESSION_FLUSH_INTERVAL,
+                 flush_batch=SESSION_FLUSH_BATCH, max_entries=SESSION_MAX_ENTRIES,
+                 sample_rates=None, max_pending=SESSION_MAX_PENDING):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.max_entries = max_entries
+        self.sample_rates = SESSION_LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+        self._pending = collections.defaultdict(list)
+        self._pending_count = 0
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._line_counts = {}
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _path(self, project_name):
+        return os.path.join(self.directory, f"{project_name}_session.jsonl")
+
+    def _legacy_path(self, project_name):
+        return os.path.join(self.directory, f"{project_name}_session.json")
+
+    def append(self, project_name, message, response, kind="chat"):
+        rate = self.sample_rates.get(kind, 1.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return
+        entry = {"timestamp": datetime.datetime.now().isoformat(), "kind": kind,
+                 "user": message, "ai": response}
+        with self._lock:
+            self._pending[project_name].append(entry)
+            self._pending_count += 1
+            self._trim_pending()
+            if self._pending_count >= self.flush_batch:
+                self._wakeup.set()
+
+    def load(self, project_name):
+        history = []
+        legacy = self._legacy_path(project_name)
+        with self._io_lock:
+            if os.path.exists(legacy):
+                with open(legacy, "r") as f:
+                    history.extend(json.load(f).get("history", []))
+            path = self._path(project_name)
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    for line in f:
+                        try:
+                            history.append(json.loads(line))
+                        except ValueError:
+                            continue  # torn write from a crash; skip it
+            with self._lock:
+                history.extend(self._pending.get(project_name, []))
+        return {"history": history}
+
+    def flush(self):
+        # Lock order is always _io_lock then _lock (as in load), so entries
+        # are visible to load() either as pending or on disk, never neither.
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = list(self._pending.items()), collections.defaultdict(list)
+                self._pending_count = 0
+            for i, (project_name, entries) in enumerate(pending):
+                written = False
+                try:
+                    path = self._path(project_name)
+                    with open(path, "a") as f:
+                        f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+                    written = True
+                    count = self._line_counts.get(project_name)
+                    if count is None:
+                        with open(path, "r") as f:
+                            count = sum(1 for _ in f)
+                    else:
+                        count += len(entries)
+                    self._line_counts[project_name] = count
+                    if count > 2 * self.max_entries:
+                        self._compact(project_name)
+                except OSError:
+                    self._line_counts.pop(project_name, None)  # recount next time
+                    self._requeue(pending[i + 1:] if written else pending[i:])
+                    raise
+
+    def _requeue(self, pending):
+        with self._lock:
+            for project_name, entries in pending:
+                self._pending[project_name] = entries + self._pending[project_name]
+                self._pending_count += len(entries)
+            self._trim_pending()
+
+    def _trim_pending(self):
+        # Caller holds _lock. Drops the oldest entries across all projects.
+        while self._pending_count > self.max_pending:
+            project_name = min((p for p, entries in self._pending.items() if entries),
+                               key=lambda p: self._pending[p][0]["timestamp"])
+            del self._pending[project_name][0]
+            self._pending_count -= 1
+            self.dropped += 1
+
+    def _compact(self, project_name):
+        path = self._path(project_name)
         with open(path, "r") as f:
-            return json.load(f)
-    return {"history": []}
-
-def save_session(project_name, message, response):
-    session = load_session(project_name)
-    timestamp = datetime.datetime.now().isoformat()
-    session["history"].append({"timestamp": timestamp, "user": message, "ai": response})
-    path = os.path.join(MEMORY_DIR, f"{project_name}_session.json")
-    with open(path, "w") as f:
-        json.dump(session, f, indent=2)
+            lines = collections.deque(f, maxlen=self.max_entries)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+        self._line_counts[project_name] = len(lines)
+
+    def _run(self):
+        failing = False
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if failing:
+                    print("Session flush recovered.")
+                failing = False
+            except OSError as e:
+                if not failing:  # report once per run of failures
+                    print(f"Session flush failed: {e}")
+                failing = True
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"Session flush failed on exit: {e}")
+        if self.dropped:
+            print(f"Session memory dropped {self.dropped} unwritten entries.")
+
+session_store = SessionStore()
+atexit.register(session_store.close)
+
+def load_session(project_name):
+    return session_store.load(project_name)
+
+def save_session(project_name, message, response, kind="chat"):
+    session_store.append(project_name, message, response, kind=kind)
 
 # ----------------------------
 # Project Management
@@ -58,23 +215,92 @@ def create_project(project_name):
     os.makedirs(project_path, exist_ok=True)
     return project_path
 
-def list_project_files(project_name):
+class ProjectFileIndex:
+    """
+    Recursive index of a project's .py files. Each directory's listing is
+    cached against its mtime, so a rescan only re-lists directories that
+    changed and otherwise costs one stat per directory.
+    """
+    IGNORED_DIRS = {"__pycache__", ".git", ".venv", "venv", "node_modules"}
+
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self._dirs = {}  # dir path -> (mtime, subdirs, py files)
+        self.files = []
+
+    def scan(self):
+        """Rescan the tree; returns True if the file list changed."""
+        seen = set()
+        files = []
+        stack = [self.root_path]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(path)
+            cached = self._dirs.get(path)
+            if cached is None or cached[0] != mtime:
+                subdirs, py_files = [], []
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in self.IGNORED_DIRS and not entry.name.startswith("."):
+                                    subdirs.append(entry.path)
+                            elif entry.name.endswith(".py"):
+                                py_files.append(entry.path)
+                except OSError:
+                    continue
+                cached = (mtime, subdirs, py_files)
+                self._dirs[path] = cached
+            stack.extend(cached[1])
+            files.extend(os.path.relpath(f, self.root_path).replace(os.sep, "/") for f in cached[2])
+        for path in set(self._dirs) - seen:
+            del self._dirs[path]
+        files.sort()
+        changed = files != self.files
+        self.files = files
+        return changed
+
+_project_indexes = {}
+
+def get_project_index(project_name):
+    project_path = os.path.join(PROJECTS_DIR, project_name)
+    index = _project_indexes.get(project_path)
+    if index is None:
+        index = _project_indexes[project_path] = ProjectFileIndex(project_path)
+    return index
+
+def list_project_files(project_name, recursive=False):
+    """
+    List a project's .py files. Only the top level by default, since search
+    and refactor act on this list; pass recursive=True to include subfolders.
+    """
     project_path = os.path.join(PROJECTS_DIR, project_name)
     if not os.path.exists(project_path):
         return []
-    return [f for f in os.listdir(project_path) if f.endswith(".py")]
+    if not recursive:
+        return [f for f in os.listdir(project_path) if f.endswith(".py")]
+    index = get_project_index(project_name)
+    index.scan()
+    return list(index.files)
+
+def project_file_path(project_name, filename):
+    return os.path.join(PROJECTS_DIR, project_name, filename)
 
 def load_project_file(project_name, filename):
-    path = os.path.join(PROJECTS_DIR, project_name, filename)
+    path = project_file_path(project_name, filename)
     if os.path.exists(path):
         with open(path, "r") as f:
             return f.read()
     return ""
 
 def save_project_file(project_name, filename, content):
-    project_path = os.path.join(PROJECTS_DIR, project_name)
-    os.makedirs(project_path, exist_ok=True)
-    with open(os.path.join(project_path, filename), "w") as f:
+    path = project_file_path(project_name, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
         f.write(content)
 
 # ----------------------------
@@ -132,19 +358,217 @@ Suggest refactor or improvements for the code. Return full code with proper inde
 # ----------------------------
 # Run Python File and capture output
 # ----------------------------
-def run_python_file(project_name, filename):
-    path = os.path.join(PROJECTS_DIR, project_name, filename)
-    if not os.path.exists(path):
-        return "File does not exist."
-    try:
-        result = subprocess.run(
-            ["python3", path],
+RUN_TIMEOUT_SECONDS = 60          # wall-clock limit; 0 disables
+RUN_CPU_LIMIT_SECONDS = 30        # RLIMIT_CPU for the child; 0 disables
+RUN_MEMORY_LIMIT_MB = 512         # RLIMIT_AS for the child; 0 disables
+OUTPUT_BUFFER_LINES = 5000        # ring buffer size per stream for captured output
+OUTPUT_POLL_MS = 50               # how often the UI drains the ring buffer
+OUTPUT_LINES_PER_POLL = 500       # most lines moved into the console per poll
+
+# Applies the rlimits inside the child interpreter and then runs the script,
+# so no preexec_fn (unsafe with other threads running) is needed.
+RUN_BOOTSTRAP = """
+import os, sys, runpy
+cpu, memory, path = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+try:
+    import resource
+except ImportError:
+    resource = None
+if resource and cpu:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+if resource and memory:
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+sys.argv = [path]
+sys.path[0] = os.path.dirname(os.path.abspath(path))
+runpy.run_path(path, run_name="__main__")
+"""
+
+class ProcessRunner:
+    """
+    Run a Python file in a child process without blocking the caller.
+    Each stream has its own bounded ring buffer, so a flood of stdout cannot
+    push out a traceback; when one is full its oldest lines are dropped and
+    counted. `max_lines=None` keeps everything. Call `drain()` to take lines
+    out in arrival order; it returns the run summary once, after the last line.
+    """
+    def __init__(self, path, timeout=RUN_TIMEOUT_SECONDS, cpu_limit=RUN_CPU_LIMIT_SECONDS,
+                 memory_limit_mb=RUN_MEMORY_LIMIT_MB, max_lines=OUTPUT_BUFFER_LINES):
+        self.path = path
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.buffers = {"stdout": collections.deque(maxlen=max_lines),
+                        "stderr": collections.deque(maxlen=max_lines)}
+        self.dropped = 0
+        self._seq = 0
+        self.process = None
+        self.returncode = None
+        self.wall_time = None
+        self.cpu_time = None
+        self.timed_out = False
+        self.stopped = False
+        self.finished = False
+        self.delivered = False
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def start(self):
+        self._start_time = time.monotonic()
+        self.process = subprocess.Popen(
+            [sys.executable or "python3", "-u", "-c", RUN_BOOTSTRAP,
+             str(self.cpu_limit or 0), str((self.memory_limit_mb or 0) * 1024 * 1024), self.path],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
             text=True,
-            check=False
+            errors="replace",
+            bufsize=1,
+            start_new_session=True  # own process group, so children can be killed too
         )
-        output = f"--- Output ---\n{result.stdout}\n--- Errors ---\n{result.stderr}"
+        readers = [
+            threading.Thread(target=self._read_stream, args=(self.process.stdout, "stdout"), daemon=True),
+            threading.Thread(target=self._read_stream, args=(self.process.stderr, "stderr"), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        threading.Thread(target=self._wait, args=(readers,), daemon=True).start()
+        if self.timeout:
+            self._timer = threading.Timer(self.timeout, self._on_timeout)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def _append(self, name, line):
+        with self._lock:
+            buffer = self.buffers[name]
+            if len(buffer) == buffer.maxlen:
+                self.dropped += 1
+            self._seq += 1
+            buffer.append((self._seq, line))
+
+    def _read_stream(self, stream, name):
+        try:
+            for line in iter(stream.readline, ""):
+                self._append(name, line)
+        except Exception as e:
+            self._append("stderr", f"[output reader failed: {e}]\n")
+        finally:
+            stream.close()
+
+    def _wait(self, readers):
+        cpu_time = None
+        if hasattr(os, "wait4"):
+            try:
+                _, status, usage = os.wait4(self.process.pid, 0)
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+                cpu_time = usage.ru_utime + usage.ru_stime
+            except ChildProcessError:
+                pass
+        self.process.wait()
+        self.cpu_time = cpu_time
+        self.returncode = self.process.returncode
+        # Subprocesses of the script may still hold the pipes open; the run
+        # is not over (and timeout/Stop stay armed) until they are closed.
+        for reader in readers:
+            reader.join()
+        self.wall_time = time.monotonic() - self._start_time
+        if self._timer:
+            self._timer.cancel()
+        with self._lock:
+            self.finished = True
+
+    def _kill(self):
+        try:
+            if os.name == "posix":
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _on_timeout(self):
+        if not self.finished:
+            self.timed_out = True
+            self._kill()
+
+    def stop(self):
+        if self.process is not None and not self.finished:
+            self.stopped = True
+            self._kill()
+
+    def is_running(self):
+        return self.process is not None and not self.delivered
+
+    def drain(self, limit=OUTPUT_LINES_PER_POLL):
+        """
+        Take up to `limit` lines (all if None) from the buffers. Returns (lines, dropped,
+        summary); `summary` is None until the run is over and fully drained.
+        """
+        with self._lock:
+            stdout, stderr = self.buffers["stdout"], self.buffers["stderr"]
+            lines = []
+            while (stdout or stderr) and (limit is None or len(lines) < limit):
+                if stdout and (not stderr or stdout[0][0] < stderr[0][0]):
+                    lines.append(("stdout", stdout.popleft()[1]))
+                else:
+                    lines.append(("stderr", stderr.popleft()[1]))
+            dropped, self.dropped = self.dropped, 0
+            summary = None
+            if self.finished and not stdout and not stderr and not self.delivered:
+                self.delivered = True
+                summary = self.summary()
+        return lines, dropped, summary
+
+    def _hit_cpu_limit(self):
+        if not self.cpu_limit or self.returncode is None:
+            return False
+        sigxcpu = getattr(signal, "SIGXCPU", None)
+        if sigxcpu and self.returncode == -sigxcpu:
+            return True
+        # Past the hard limit the kernel sends SIGKILL instead
+        return (self.returncode == -getattr(signal, "SIGKILL", 9)
+                and self.cpu_time is not None and self.cpu_time >= self.cpu_limit)
+
+    def summary(self):
+        if self.timed_out:
+            status = f"Timed out after {self.timeout}s"
+        elif self.stopped:
+            status = "Stopped"
+        elif self._hit_cpu_limit():
+            status = f"CPU limit exceeded ({self.cpu_limit}s)"
+        else:
+            status = f"Exit code {self.returncode}"
+        cpu = f"{self.cpu_time:.2f}s" if self.cpu_time is not None else "n/a"
+        return f"--- {status} | wall {self.wall_time:.2f}s | cpu {cpu} ---"
+
+def start_python_file(project_name, filename, **limits):
+    """
+    Start running a project file asynchronously. Returns a ProcessRunner,
+    or None if the file does not exist.
+    """
+    path = project_file_path(project_name, filename)
+    if not os.path.exists(path):
+        return None
+    return ProcessRunner(path, **limits).start()
+
+def run_python_file(project_name, filename, timeout=RUN_TIMEOUT_SECONDS):
+    """
+    Blocking helper: run a project file to completion and return its output.
+    """
+    try:
+        # Unbounded buffers: like subprocess.run, return the full output
+        runner = start_python_file(project_name, filename, timeout=timeout, max_lines=None)
+        if runner is None:
+            return "File does not exist."
+        stdout, stderr = [], []
+        while True:
+            lines, _, summary = runner.drain(limit=None)
+            for kind, line in lines:
+                (stdout if kind == "stdout" else stderr).append(line)
+            if summary:
+                break
+            time.sleep(OUTPUT_POLL_MS / 1000)
+        output = f"--- Output ---\n{''.join(stdout)}\n--- Errors ---\n{''.join(stderr)}\n{summary}"
     except Exception as e:
         output = f"Execution failed: {str(e)}"
     return output
@@ -207,7 +631,7 @@ Code context around cursor:
 
 Suggest next lines of code or completions. Return only code suggestions as separate lines.
 """
-    response = llama3_generate(prompt, project_name=project_name)
+    response = llama3_generate(prompt, project_name=project_name, kind="autocomplete")
     suggestions = [line for line in response.split("\n") if line.strip()]
     return suggestions
 
@@ -217,6 +641,8 @@ def bind_autocomplete(text_widget, project_name):
     def on_key(event):
         if event.keysym in ("Up", "Down", "Return", "Escape"):
             return
+        if str(text_widget.cget("state")) == "disabled":
+            return  # buffer is loading or unloaded
         code_context = text_widget.get("1.0", "insert")
         suggestions = get_autocomplete_suggestions(project_name, code_context)
         popup.show(suggestions)
@@ -243,8 +669,8 @@ class CustomText(tk.Text):
         if self.linenumbers:
             self.linenumbers.config(state="normal")
             self.linenumbers.delete("1.0", tk.END)
-            for i in range(1, int(self.index("end-1c").split(".")[0]) + 1):
-                self.linenumbers.insert(tk.END, f"{i}\n")
+            line_count = int(self.index("end-1c").split(".")[0])
+            self.linenumbers.insert(tk.END, "\n".join(str(i) for i in range(1, line_count + 1)) + "\n")
             self.linenumbers.config(state="disabled")
 
     def on_key_release(self, event=None):
@@ -284,6 +710,179 @@ class CustomText(tk.Text):
         self.tag_config("string", foreground="#CE9178")
         self.tag_config("comment", foreground="#6A9955")
 
+# ----------------------------
+# Editor Buffers (LRU + disk cache)
+# ----------------------------
+MAX_LOADED_BUFFERS = 8            # editor tabs whose text stays in memory
+LARGE_FILE_BYTES = 256 * 1024     # files above this are loaded in chunks
+LOAD_CHUNK_CHARS = 64 * 1024      # characters inserted per Tk event-loop turn
+FILE_TREE_POLL_MS = 2000          # how often the file browser rescans the project
+MAX_OPEN_TABS = 12                # clean, idle tabs beyond this are closed LRU-first
+
+def insert_file_chunked(root, text_widget, path, is_current, on_done):
+    """
+    Fill `text_widget` from `path`. Small files are inserted at once; large
+    ones a chunk per event-loop turn so the UI stays responsive. Loading is
+    abandoned as soon as `is_current()` returns False. `on_done(ok)` is called
+    with ok=False if the file could not be opened or read. The widget is left
+    disabled so the user cannot type into a half-loaded buffer.
+    """
+    def put(text):
+        text_widget.config(state="normal")
+        text_widget.insert("end-1c", text)
+        text_widget.config(state="disabled")
+
+    try:
+        f = open(path, "r")
+        if os.fstat(f.fileno()).st_size <= LARGE_FILE_BYTES:
+            with f:
+                put(f.read())
+            on_done(True)
+            return
+    except (OSError, ValueError):
+        on_done(False)
+        return
+
+    def step():
+        if not is_current() or not text_widget.winfo_exists():
+            f.close()
+            return
+        try:
+            chunk = f.read(LOAD_CHUNK_CHARS)
+        except (OSError, ValueError):
+            f.close()
+            on_done(False)
+            return
+        if chunk:
+            put(chunk)
+            root.after(1, step)
+        else:
+            f.close()
+            on_done(True)
+
+    step()
+
+class BufferCache:
+    """
+    Keeps at most `max_loaded` editor buffers in memory. Least recently used
+    buffers are written to a temporary cache file and their widgets emptied;
+    they are restored (unsaved edits included) when their tab is shown again.
+    A buffer that never finished loading is reloaded from its source file.
+    The widget's modified flag is carried across unloads.
+    """
+    def __init__(self, root, max_loaded=MAX_LOADED_BUFFERS):
+        self.root = root
+        self.max_loaded = max_loaded
+        self.cache_dir = tempfile.mkdtemp(prefix="llama3_ide_buffers_")
+        self.buffers = {}
+        self.loaded = collections.OrderedDict()
+        self._next_id = 0
+
+    def add(self, key, text_widget, path, on_unload=None):
+        self._next_id += 1
+        self.buffers[key] = {
+            "text": text_widget,
+            "source_path": path,
+            "cache_path": os.path.join(self.cache_dir, f"{self._next_id}.buf"),
+            "cached": False,
+            "modified": False,
+            "on_unload": on_unload,
+            "generation": 0,
+            "ready": False,
+            "insert": "1.0",
+            "yview": 0.0,
+        }
+        self._load(key, path)
+
+    def is_ready(self, key):
+        state = self.buffers.get(key)
+        return bool(state and state["ready"])
+
+    def is_modified(self, key):
+        state = self.buffers.get(key)
+        if state is None:
+            return False
+        if state["ready"]:
+            return bool(state["text"].edit_modified())
+        return state["modified"]
+
+    def touch(self, key):
+        state = self.buffers.get(key)
+        if state is None:
+            return
+        if key in self.loaded:
+            self.loaded.move_to_end(key)
+        else:
+            self._load(key, state["cache_path"] if state["cached"] else state["source_path"])
+        for oldest in list(self.loaded)[:max(0, len(self.loaded) - self.max_loaded)]:
+            self.unload(oldest)
+
+    def _load(self, key, path):
+        state = self.buffers[key]
+        state["generation"] += 1
+        generation = state["generation"]
+        state["ready"] = False
+        self.loaded[key] = True
+        self.loaded.move_to_end(key)
+        text_widget = state["text"]
+        text_widget.config(state="disabled")
+
+        def done(ok):
+            if not ok:
+                # Never mark a failed load ready, or Save would write it back empty
+                text_widget.config(state="normal")
+                text_widget.delete("1.0", tk.END)
+                text_widget.config(state="disabled")
+                text_widget.update_linenumbers()
+                return
+            state["ready"] = True
+            text_widget.config(state="normal")
+            text_widget.edit_reset()
+            text_widget.edit_modified(state["modified"])
+            text_widget.mark_set("insert", state["insert"])
+            text_widget.yview_moveto(state["yview"])
+            text_widget.update_linenumbers()
+
+        insert_file_chunked(self.root, text_widget, path,
+                            lambda: state["generation"] == generation, done)
+
+    def unload(self, key):
+        state = self.buffers.get(key)
+        if state is None or key not in self.loaded:
+            return
+        text_widget = state["text"]
+        if state["ready"]:
+            try:
+                with open(state["cache_path"], "w") as f:
+                    f.write(text_widget.get("1.0", "end-1c"))
+            except OSError:
+                return  # keep it in memory rather than lose edits
+            state["cached"] = True
+            state["modified"] = bool(text_widget.edit_modified())
+            state["insert"] = text_widget.index("insert")
+            state["yview"] = text_widget.yview()[0]
+        del self.loaded[key]
+        state["generation"] += 1  # cancels a load still in progress
+        state["ready"] = False
+        text_widget.config(state="normal")
+        text_widget.delete("1.0", tk.END)
+        text_widget.edit_reset()
+        text_widget.update_linenumbers()
+        text_widget.config(state="disabled")
+        if state["on_unload"]:
+            state["on_unload"]()
+
+    def discard(self, key):
+        state = self.buffers.pop(key, None)
+        self.loaded.pop(key, None)
+        if state:
+            state["generation"] += 1
+            if os.path.exists(state["cache_path"]):
+                os.remove(state["cache_path"])
+
+    def close(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
 # ----------------------------
 # Tkinter IDE UI
 # ----------------------------
@@ -309,9 +908,9 @@ class Llama3IDE:
         self.left_frame = tk.Frame(root, width=200)
         self.left_frame.pack(side=tk.LEFT, fill=tk.Y)
         tk.Label(self.left_frame, text="Project Files", font=("Arial", 12, "bold")).pack(pady=5)
-        self.file_listbox = tk.Listbox(self.left_frame)
-        self.file_listbox.pack(expand=True, fill=tk.Y, padx=5, pady=5)
-        self.file_listbox.bind("<<ListboxSelect>>", self.open_selected_file)
+        self.file_tree = ttk.Treeview(self.left_frame, show="tree", selectmode="browse")
+        self.file_tree.pack(expand=True, fill=tk.Y, padx=5, pady=5)
+        self.file_tree.bind("<<TreeviewSelect>>", self.open_selected_file)
         tk.Button(self.left_frame, text="New File", command=self.create_new_file).pack(pady=5)
 
         # Right Frame: Tabbed Code Editor
@@ -320,6 +919,14 @@ class Llama3IDE:
 
         self.tab_control = ttk.Notebook(self.right_frame)
         self.tab_control.pack(expand=True, fill=tk.BOTH)
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+        # (project, filename) -> {"tab", "close", "busy"}, least recently shown first
+        self.open_tabs = collections.OrderedDict()
+        self.buffers = BufferCache(root)
+        atexit.register(self.buffers.close)
+        self.tree_project = None
+        self.watch_file_list()
 
     def load_project(self):
         project_name = self.project_name_var.get().strip()
@@ -329,30 +936,98 @@ class Llama3IDE:
         create_project(project_name)
         self.refresh_file_list()
 
-    def refresh_file_list(self):
-        self.file_listbox.delete(0, tk.END)
+    def refresh_file_list(self, files=None):
         project_name = self.project_name_var.get().strip()
-        for f in list_project_files(project_name):
-            self.file_listbox.insert(tk.END, f)
+        if project_name != self.tree_project:
+            self.file_tree.delete(*self.file_tree.get_children())
+            self.tree_project = project_name
+        if files is None:
+            files = list_project_files(project_name, recursive=True) if project_name else []
+        files = set(files)
+        shown = {item for item in self._tree_items() if "file" in self.file_tree.item(item, "tags")}
+
+        for item in shown - files:
+            parent = self.file_tree.parent(item)
+            self.file_tree.delete(item)
+            # Drop directories left empty
+            while parent and not self.file_tree.get_children(parent):
+                grandparent = self.file_tree.parent(parent)
+                self.file_tree.delete(parent)
+                parent = grandparent
+        for f in sorted(files - shown):
+            parent = ""
+            parts = f.split("/")
+            for i, part in enumerate(parts[:-1]):
+                dir_id = "dir:" + "/".join(parts[:i + 1])
+                if not self.file_tree.exists(dir_id):
+                    self.file_tree.insert(parent, self._tree_position(parent, part), iid=dir_id,
+                                          text=part, tags=("dir",))
+                parent = dir_id
+            self.file_tree.insert(parent, self._tree_position(parent, parts[-1]), iid=f,
+                                  text=parts[-1], tags=("file",))
+
+    def _tree_items(self, parent=""):
+        for item in self.file_tree.get_children(parent):
+            yield item
+            yield from self._tree_items(item)
+
+    def _tree_position(self, parent, name):
+        for i, item in enumerate(self.file_tree.get_children(parent)):
+            if self.file_tree.item(item, "text") > name:
+                return i
+        return tk.END
+
+    def watch_file_list(self):
+        if self.tree_project and self.tree_project == self.project_name_var.get().strip():
+            index = get_project_index(self.tree_project)
+            if index.scan():
+                self.refresh_file_list(index.files)
+        self.root.after(FILE_TREE_POLL_MS, self.watch_file_list)
 
     def open_selected_file(self, event):
-        selection = self.file_listbox.curselection()
-        if not selection:
+        selection = self.file_tree.selection()
+        if not selection or "file" not in self.file_tree.item(selection[0], "tags"):
             return
-        filename = self.file_listbox.get(selection[0])
-        self.open_file_tab(filename)
+        self.open_file_tab(selection[0])
+
+    def on_tab_changed(self, event=None):
+        selected = self.tab_control.select()
+        key = next((k for k, entry in self.open_tabs.items() if str(entry["tab"]) == selected), None)
+        if key is None:
+            return
+        self.open_tabs.move_to_end(key)
+        self.buffers.touch(key)
+        self.close_excess_tabs()
+
+    def close_excess_tabs(self):
+        # Oldest first; tabs with unsaved edits or a running file are kept
+        selected = self.tab_control.select()
+        for key, entry in list(self.open_tabs.items()):
+            if len(self.open_tabs) <= MAX_OPEN_TABS:
+                break
+            if str(entry["tab"]) == selected or entry["busy"]() or self.buffers.is_modified(key):
+                continue
+            entry["close"](ask=False)
 
     def create_new_file(self):
         filename = filedialog.asksaveasfilename(defaultextension=".py", filetypes=[("Python Files","*.py")])
         if filename:
             project_name = self.project_name_var.get().strip()
-            save_project_file(project_name, os.path.basename(filename), "")
+            project_path = os.path.abspath(os.path.join(PROJECTS_DIR, project_name))
+            relative = os.path.relpath(os.path.abspath(filename), project_path)
+            if relative.startswith(os.pardir):
+                relative = os.path.basename(filename)
+            relative = relative.replace(os.sep, "/")
+            save_project_file(project_name, relative, "")
             self.refresh_file_list()
-            self.open_file_tab(os.path.basename(filename))
+            self.open_file_tab(relative)
 
     def open_file_tab(self, filename):
         project_name = self.project_name_var.get().strip()
-        content = load_project_file(project_name, filename)
+        key = (project_name, filename)
+        if key in self.open_tabs:
+            self.tab_control.select(self.open_tabs[key]["tab"])
+            return
 
         tab = tk.Frame(self.tab_control)
         self.tab_control.add(tab, text=filename)
@@ -366,7 +1041,6 @@ class Llama3IDE:
 
         code_text = CustomText(editor_frame)
         code_text.pack(expand=True, fill=tk.BOTH, side=tk.RIGHT)
-        code_text.insert("1.0", content)
         code_text.set_linenumbers(linenumbers)
 
         # Bind AI Auto-Completion
@@ -395,19 +1069,105 @@ class Llama3IDE:
             messagebox.showinfo("Copied", "Code copied to clipboard!")
 
         def save_file():
+            if not self.buffers.is_ready(key):
+                messagebox.showwarning("Not Loaded", f"{filename} is still loading or could not be read.")
+                return False
             save_project_file(project_name, filename, code_text.get("1.0", tk.END))
+            code_text.edit_modified(False)
             messagebox.showinfo("Saved", f"{filename} saved successfully.")
+            return True
+
+        output_console.tag_config("stderr", foreground="#F48771")
+        output_console.tag_config("status", foreground="#569CD6")
+        timeout_var = tk.IntVar(value=RUN_TIMEOUT_SECONDS)
+        active_run = None  # cleared only once its summary has been shown
+
+        def append_output(lines):
+            # One insert per run of same-stream lines instead of one per line
+            for kind, group in itertools.groupby(lines, key=lambda item: item[0]):
+                output_console.insert(tk.END, "".join(line for _, line in group), kind)
+            # Keep the console itself bounded like the runner's ring buffer
+            excess = int(output_console.index("end-1c").split(".")[0]) - OUTPUT_BUFFER_LINES
+            if excess > 0:
+                output_console.delete("1.0", f"{excess + 1}.0")
+            output_console.see(tk.END)
+
+        def poll_output(run):
+            nonlocal active_run
+            if not output_console.winfo_exists():
+                run.stop()
+                return
+            lines, dropped, summary = run.drain()
+            if dropped:
+                lines.insert(0, ("status", f"[... {dropped} lines dropped ...]\n"))
+            if lines:
+                append_output(lines)
+            if summary:
+                append_output([("status", f"\n{summary}\n")])
+                if active_run is run:
+                    active_run = None
+                    stop_button.config(state="disabled")
+            else:
+                self.root.after(OUTPUT_POLL_MS, poll_output, run)
 
         def run_file():
-            save_file()  # Save before running
-            output = run_python_file(project_name, filename)
+            nonlocal active_run
+            if active_run is not None:
+                messagebox.showwarning("Running", f"{filename} is already running.")
+                return
+            if not save_file():  # Save before running
+                return
             output_console.delete("1.0", tk.END)
-            output_console.insert(tk.END, output)
+            try:
+                timeout = timeout_var.get()
+            except tk.TclError:
+                timeout = RUN_TIMEOUT_SECONDS
+            try:
+                run = start_python_file(project_name, filename, timeout=timeout)
+            except Exception as e:
+                output_console.insert(tk.END, f"Execution failed: {str(e)}")
+                return
+            if run is None:
+                output_console.insert(tk.END, "File does not exist.")
+                return
+            active_run = run
+            stop_button.config(state="normal")
+            poll_output(run)
+
+        def stop_file():
+            if active_run:
+                active_run.stop()
+
+        def release_output():
+            # Called when the buffer is evicted; an idle console is emptied too
+            if active_run is None:
+                output_console.delete("1.0", tk.END)
+                output_console.insert(tk.END, "# Output console\n")
+
+        def close_tab(ask=True):
+            if ask and self.buffers.is_modified(key):
+                answer = messagebox.askyesnocancel("Unsaved Changes", f"Save changes to {filename}?")
+                if answer is None or (answer and not save_file()):
+                    return
+            stop_file()
+            self.buffers.discard(key)
+            del self.open_tabs[key]
+            self.tab_control.forget(tab)
+            tab.destroy()
 
         tk.Button(bottom_frame, text="AI Suggestion", command=get_ai_suggestion).pack(side=tk.LEFT, padx=5)
         tk.Button(bottom_frame, text="Copy Code", command=copy_ai_suggestion).pack(side=tk.LEFT, padx=5)
         tk.Button(bottom_frame, text="Save File", command=save_file).pack(side=tk.LEFT, padx=5)
         tk.Button(bottom_frame, text="Run File", command=run_file).pack(side=tk.LEFT, padx=5)
+        stop_button = tk.Button(bottom_frame, text="Stop", command=stop_file, state="disabled")
+        stop_button.pack(side=tk.LEFT, padx=5)
+        tk.Label(bottom_frame, text="Timeout (s):").pack(side=tk.LEFT)
+        tk.Entry(bottom_frame, textvariable=timeout_var, width=5).pack(side=tk.LEFT, padx=5)
+        tk.Button(bottom_frame, text="Close Tab", command=close_tab).pack(side=tk.LEFT, padx=5)
+
+        self.open_tabs[key] = {"tab": tab, "close": close_tab, "busy": lambda: active_run is not None}
+        self.buffers.add(key, code_text, project_file_path(project_name, filename), on_unload=release_output)
+        self.tab_control.select(tab)
 
     # ----------------------------
     # Project-wide AI Search